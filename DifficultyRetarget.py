@@ -0,0 +1,71 @@
+from collections import deque
+
+MAX_TARGET = 2**256 - 1
+INITIAL_TARGET = 16**61 - 1  # Same as the old fixed difficulty of 3 leading hex zeros
+
+class DifficultyRetarget:
+    """Proof-of-work target that retargets after every block from a sliding window.
+
+    Only the time spent searching for a nonce counts towards the block interval,
+    so idle time in the interactive menus does not make mining easier.
+    """
+    def __init__(self, target_block_time=1.0, window=10, initial_target=INITIAL_TARGET, max_adjustment=4):
+        if target_block_time <= 0 or window < 1 or max_adjustment < 1:
+            raise ValueError("Invalid retarget parameters")
+        self.target_block_time = target_block_time
+        self.max_adjustment = max_adjustment
+        self.target = initial_target
+        self.window = deque(maxlen=window)  # Most recent blocks used for retargeting
+        self.telemetry = []  # One entry per mined block
+
+    @staticmethod
+    def expected_hashes(target):
+        """Average number of hashes needed to find a hash <= target."""
+        return (MAX_TARGET + 1) / (target + 1)
+
+    @property
+    def difficulty(self):
+        return self.expected_hashes(self.target)
+
+    def meets_target(self, digest):
+        return int.from_bytes(digest, "big") <= self.target
+
+    def record_block(self, timestamp, solve_time, hashes):
+        """Store timing for a freshly mined block and retarget for the next one."""
+        solve_time = max(solve_time, 1e-6)
+        expected = self.expected_hashes(self.target)
+        block = {
+            'timestamp': timestamp,
+            'solve_time': solve_time,
+            'hashes': hashes,
+            'target': self.target,
+            'measured_hashrate': hashes / solve_time,  # What this machine actually did
+            'estimated_hashrate': expected / solve_time,  # What the target implies
+        }
+        self.window.append(block)
+        self.telemetry.append(block)
+        self.retarget()
+        return block
+
+    def estimated_hashrate(self):
+        """Hashrate implied by the work and solve times of the blocks in the window."""
+        if not self.window:
+            return 0.0
+        work = sum(self.expected_hashes(block['target']) for block in self.window)
+        return work / sum(block['solve_time'] for block in self.window)
+
+    def retarget(self):
+        # Aim the next target at the work-weighted hashrate of the window, then limit how far
+        # a single block may move it so one outlier cannot swing the difficulty too far
+        hashrate = self.estimated_hashrate()
+        new_target = int((MAX_TARGET + 1) / (hashrate * self.target_block_time)) - 1
+        lowest = max(1, self.target // self.max_adjustment)
+        highest = min(MAX_TARGET, self.target * self.max_adjustment)
+        self.target = min(max(new_target, lowest), highest)
+
+    def print_telemetry(self):
+        print("\n--- Mining Telemetry ---")
+        for index, block in enumerate(self.telemetry, start=1):
+            print(f"Block {index}: {block['solve_time']:.3f}s, {block['hashes']} hashes, "
+                  f"{block['measured_hashrate']:.0f} H/s, difficulty {self.expected_hashes(block['target']):.0f}")
+        print(f"Estimated hashrate over last {len(self.window)} blocks: {self.estimated_hashrate():.0f} H/s")
@@ -2,6 +2,7 @@ import random
 import hashlib
 import time
 from collections import defaultdict
+from DifficultyRetarget import DifficultyRetarget
 
 class Node:
     def __init__(self, node_id):
@@ -16,18 +17,23 @@ class Blockchain:
         self.chain = []
         self.pending_transactions = []
         self.nodes = {}
-        self.difficulty = 3
+        self.consensus = DifficultyRetarget()  # Retargets the mining target from recent block times
 
     def create_genesis_block(self):
         genesis_block = self.create_block("Genesis Block")
         self.chain.append(genesis_block)
 
     def create_block(self, transactions):
+        previous_hash = self.hash(self.chain[-1]) if self.chain else '0'
+        target = self.consensus.target
+        nonce, stats = self.mine_block_nonce(previous_hash)
         block = {
             'index': len(self.chain) + 1,
             'transactions': transactions,
-            'previous_hash': self.hash(self.chain[-1]) if self.chain else '0',
-            'nonce': self.mine_block_nonce()
+            'previous_hash': previous_hash,
+            'target': f"{target:064x}",
+            'nonce': nonce,
+            'timestamp': stats['timestamp']
         }
         return block
 
@@ -47,14 +53,17 @@ class Blockchain:
     def hash(self, block):
         return hashlib.sha256(str(block).encode()).hexdigest()
 
-    def mine_block_nonce(self):
+    def mine_block_nonce(self, previous_hash):
         print("Mining block...")
+        start = time.perf_counter()  # Monotonic, so clock steps cannot skew retargeting
         nonce = 0
         while True:
-            guess = f"{nonce}".encode()
-            guess_hash = hashlib.sha256(guess).hexdigest()
-            if guess_hash[:self.difficulty] == "0" * self.difficulty:
-                return nonce
+            guess = f"{previous_hash}{nonce}".encode()
+            if self.consensus.meets_target(hashlib.sha256(guess).digest()):
+                solve_time = time.perf_counter() - start
+                stats = self.consensus.record_block(time.time(), solve_time, nonce + 1)
+                print(f"Nonce found in {stats['solve_time']:.3f}s at {stats['measured_hashrate']:.0f} H/s")
+                return nonce, stats
             nonce += 1
 
     def print_chain(self):
@@ -145,6 +154,7 @@ def main():
         elif choice == '4':
             print("\n--- Blockchain State ---")
             blockchain.print_chain()
+            blockchain.consensus.print_telemetry()
 
         elif choice == '5':
             blockchain.print_balances()
@@ -0,0 +1,347 @@
+import heapq
+import errno
+import math
+import multiprocessing
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+# Each cross-shard message is (arrival time, destination node, transaction id, source node)
+RECORD = struct.Struct("<dqqq")
+# Ring header: read counter (written by the consumer), write counter (written by the producer)
+COUNTER = struct.Struct("<Q")
+HEADER_SIZE = 2 * COUNTER.size
+MIN_RING_CAPACITY = 16
+DEFAULT_RING_CAPACITY = 1 << 14
+DEFAULT_SHM_BUDGET = 32 << 20  # Half of a container's default 64 MiB /dev/shm
+
+class GossipScenario:
+    """Parameters of a large-scale Sybil gossip run, shared by every shard.
+
+    This is a standalone hop-by-hop gossip model over numbered nodes, not a partition
+    of a Blockchain's node objects: balances and the chain itself are not simulated.
+    """
+    def __init__(self, num_honest, num_sybil, num_transactions, fanout=2, relay_probability=0.7,
+                 min_latency=0.05, max_latency=0.2, minimum_stake=None,
+                 honest_stake=(10, 30), sybil_stake=(0, 10), seed=0):
+        if min_latency <= 0 or max_latency < min_latency:
+            raise ValueError("Link latency must satisfy 0 < min_latency <= max_latency")
+        if num_honest < 0 or num_sybil < 0 or num_honest + num_sybil == 0:
+            raise ValueError("The network needs at least one node")
+        self.num_honest = num_honest
+        self.num_sybil = num_sybil
+        self.num_transactions = num_transactions
+        self.fanout = fanout
+        self.relay_probability = relay_probability
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.minimum_stake = minimum_stake  # None disables the PoS eligibility check
+        self.honest_stake = honest_stake
+        self.sybil_stake = sybil_stake
+        self.seed = seed
+
+    @property
+    def total_nodes(self):
+        return self.num_honest + self.num_sybil
+
+    def node_rng(self, node, tx):
+        # Every decision a node makes about a transaction comes from its own stream,
+        # so results do not depend on which shard the node lives in.
+        return random.Random(f"{self.seed}:{node}:{tx}")
+
+    def stake(self, node):
+        rng = random.Random(f"{self.seed}:stake:{node}")
+        if node < self.num_honest:
+            return rng.randint(*self.honest_stake)
+        return rng.randint(*self.sybil_stake)  # Low stake for Sybil nodes by default
+
+    def transactions(self):
+        """Yield (tx_id, origin, send_time) for every transaction, blocked or not.
+
+        Like the flood in sybil_attack, senders are drawn from honest and Sybil nodes alike.
+        """
+        rng = random.Random(f"{self.seed}:transactions")
+        for tx in range(self.num_transactions):
+            origin = rng.randrange(self.total_nodes)
+            yield tx, origin, rng.uniform(0, self.max_latency)
+
+    def is_eligible(self, node):
+        return self.minimum_stake is None or self.stake(node) >= self.minimum_stake
+
+class RingBuffer:
+    """Single-producer single-consumer ring of message records at a fixed offset in shared memory."""
+    def __init__(self, buf, offset, capacity):
+        self.buf = buf
+        self.offset = offset
+        self.capacity = capacity
+
+    @staticmethod
+    def size(capacity):
+        return HEADER_SIZE + capacity * RECORD.size
+
+    def reset(self):
+        self._write_counter(0, 0)
+        self._write_counter(1, 0)
+
+    def _read_counter(self, index):
+        return COUNTER.unpack_from(self.buf, self.offset + index * COUNTER.size)[0]
+
+    def _write_counter(self, index, value):
+        COUNTER.pack_into(self.buf, self.offset + index * COUNTER.size, value)
+
+    def _record_offset(self, position):
+        return self.offset + HEADER_SIZE + (position % self.capacity) * RECORD.size
+
+    def push(self, record):
+        head = self._read_counter(0)
+        tail = self._read_counter(1)
+        if tail - head >= self.capacity:
+            return False  # Full, the producer has to wait for the consumer
+        RECORD.pack_into(self.buf, self._record_offset(tail), *record)
+        self._write_counter(1, tail + 1)  # Publish only after the record is written
+        return True
+
+    def pop_all(self):
+        head = self._read_counter(0)
+        tail = self._read_counter(1)
+        records = []
+        while head < tail:
+            records.append(RECORD.unpack_from(self.buf, self._record_offset(head)))
+            head += 1
+        self._write_counter(0, head)
+        return records
+
+def ring_offset(src, dst, num_shards, capacity):
+    """Offset of the src -> dst ring inside the single segment holding every ring."""
+    index = src * (num_shards - 1) + (dst if dst < src else dst - 1)
+    return index * RingBuffer.size(capacity)
+
+class Shard:
+    """Event queue and gossip state for the nodes owned by one worker."""
+    def __init__(self, scenario, shard_id, num_shards):
+        self.scenario = scenario
+        self.shard_id = shard_id
+        self.num_shards = num_shards
+        self.events = []
+        self.seen = set()  # (tx, node) pairs that already received the transaction
+        self.messages = 0
+        self.reached = {}
+        self.last_delivery = {}
+        self.blocked = 0
+
+        for tx, origin, send_time in scenario.transactions():
+            if origin % num_shards != shard_id:
+                continue
+            if scenario.is_eligible(origin):
+                heapq.heappush(self.events, (send_time, origin, tx, -1))
+            else:
+                self.blocked += 1
+
+    def push(self, record):
+        heapq.heappush(self.events, tuple(record))
+
+    def next_time(self):
+        return self.events[0][0] if self.events else math.inf
+
+    def process_until(self, window_end, emit):
+        """Deliver every queued message that arrives strictly before window_end."""
+        scenario = self.scenario
+        total_nodes = scenario.total_nodes
+        while self.events and self.events[0][0] < window_end:
+            arrival, node, tx, source = heapq.heappop(self.events)
+            self.messages += 1
+            if (tx, node) in self.seen:
+                continue
+            self.seen.add((tx, node))
+            self.reached[tx] = self.reached.get(tx, 0) + 1
+            self.last_delivery[tx] = max(self.last_delivery.get(tx, 0.0), arrival)
+
+            rng = scenario.node_rng(node, tx)
+            if source != -1 and rng.random() >= scenario.relay_probability:
+                continue  # Random chance to propagate, the origin always does
+            for _ in range(scenario.fanout):
+                peer = rng.randrange(total_nodes)
+                if peer != node:
+                    latency = rng.uniform(scenario.min_latency, scenario.max_latency)
+                    emit((arrival + latency, peer, tx, node))
+
+    def summary(self):
+        return {
+            'messages': self.messages,
+            'blocked': self.blocked,
+            'reached': self.reached,
+            'last_delivery': self.last_delivery,
+        }
+
+def merge_summaries(summaries):
+    result = {'messages': 0, 'blocked': 0, 'reached': {}, 'last_delivery': {}}
+    for summary in summaries:
+        result['messages'] += summary['messages']
+        result['blocked'] += summary['blocked']
+        for tx, count in summary['reached'].items():
+            result['reached'][tx] = result['reached'].get(tx, 0) + count
+        for tx, arrival in summary['last_delivery'].items():
+            result['last_delivery'][tx] = max(result['last_delivery'].get(tx, 0.0), arrival)
+    result['reached'] = dict(sorted(result['reached'].items()))
+    result['last_delivery'] = dict(sorted(result['last_delivery'].items()))
+    return result
+
+def run_single_process(scenario):
+    """Reference run: one shard owns every node and drains its queue to completion."""
+    shard = Shard(scenario, 0, 1)
+    shard.process_until(math.inf, shard.push)
+    return merge_summaries([shard.summary()])
+
+def _shard_worker(shard_id, scenario, num_shards, shm_name, ring_capacity,
+                  finished, window_done, next_times, barrier, results):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        outbound = {dst: RingBuffer(shm.buf, ring_offset(shard_id, dst, num_shards, ring_capacity), ring_capacity)
+                    for dst in range(num_shards) if dst != shard_id}
+        inbound = [RingBuffer(shm.buf, ring_offset(src, shard_id, num_shards, ring_capacity), ring_capacity)
+                   for src in range(num_shards) if src != shard_id]
+        shard = Shard(scenario, shard_id, num_shards)
+
+        def drain():
+            for ring in inbound:
+                for record in ring.pop_all():
+                    shard.push(record)
+
+        def emit(record):
+            dst = record[1] % num_shards
+            if dst == shard_id:
+                shard.push(record)
+                return
+            # Keep draining our own inbox while blocked so two full rings cannot deadlock,
+            # and wake shards waiting at the window boundary so they drain theirs too
+            while not outbound[dst].push(record):
+                drain()
+                with window_done:
+                    window_done.notify_all()
+                time.sleep(0.0005)
+
+        # Conservative synchronization: nothing sent in a window can arrive before it ends,
+        # because every link takes at least min_latency. Each shard can therefore process
+        # its whole window independently and only exchange messages at the boundary.
+        rounds = 0
+        next_times[shard_id] = shard.next_time()
+        barrier.wait()
+        while True:
+            window_start = min(next_times[:])
+            if window_start == math.inf:
+                break
+            shard.process_until(window_start + scenario.min_latency, emit)
+
+            rounds += 1
+            with window_done:
+                finished.value += 1
+                window_done.notify_all()
+            while True:
+                drain()
+                with window_done:
+                    if finished.value >= rounds * num_shards:
+                        break
+                    if barrier.broken:
+                        raise threading.BrokenBarrierError
+                    window_done.wait(0.01)
+            barrier.wait()
+            drain()  # Every producer is done with this window now
+            next_times[shard_id] = shard.next_time()
+            barrier.wait()
+
+        results.put((shard_id, shard.summary()))
+    except threading.BrokenBarrierError:
+        return  # Another shard failed and reports the error, exit quietly
+    except BaseException:
+        barrier.abort()  # Release the other shards instead of leaving them waiting forever
+        raise
+    finally:
+        shm.close()
+
+def shm_available():
+    """Free bytes in the shared memory filesystem, or None where it cannot be queried."""
+    if not os.path.isdir("/dev/shm"):
+        return None
+    stats = os.statvfs("/dev/shm")
+    return stats.f_bavail * stats.f_frsize
+
+def run_sharded(scenario, num_shards=None, ring_capacity=None, shm_budget=DEFAULT_SHM_BUDGET):
+    """Partition the nodes across worker processes and run the gossip in lockstep windows.
+
+    Unless ring_capacity is given, the rings share shm_budget bytes between them, so the
+    segment stays the same size however many shards there are.
+    """
+    if num_shards is not None and num_shards < 0:
+        raise ValueError("Number of shards must not be negative")
+    num_shards = num_shards or multiprocessing.cpu_count()
+    if num_shards == 1:
+        return run_single_process(scenario)
+
+    num_rings = num_shards * (num_shards - 1)
+    if ring_capacity is None:
+        ring_capacity = min(DEFAULT_RING_CAPACITY, (shm_budget // num_rings - HEADER_SIZE) // RECORD.size)
+        if ring_capacity < MIN_RING_CAPACITY:
+            raise ValueError(f"Shared memory budget of {shm_budget} bytes is too small for {num_shards} shards")
+    segment_size = num_rings * RingBuffer.size(ring_capacity)
+    available = shm_available()
+    if available is not None and segment_size > available:
+        raise OSError(errno.ENOSPC, f"Need {segment_size} bytes of shared memory, only {available} free")
+
+    window_done = multiprocessing.Condition()
+    finished = multiprocessing.RawValue('q', 0)  # Guarded by window_done
+    next_times = multiprocessing.Array('d', num_shards, lock=False)
+    barrier = multiprocessing.Barrier(num_shards)
+    results = multiprocessing.Queue()
+    shm = None
+    workers = []
+    try:
+        # One segment for every ring keeps open file descriptors constant as shards grow
+        shm = shared_memory.SharedMemory(create=True, size=segment_size)
+        for src in range(num_shards):
+            for dst in range(num_shards):
+                if src != dst:
+                    RingBuffer(shm.buf, ring_offset(src, dst, num_shards, ring_capacity), ring_capacity).reset()
+
+        workers = [multiprocessing.Process(target=_shard_worker,
+                                           args=(shard_id, scenario, num_shards, shm.name, ring_capacity,
+                                                 finished, window_done, next_times, barrier, results))
+                   for shard_id in range(num_shards)]
+        for worker in workers:
+            worker.start()
+
+        # Collect before join so the queue can flush, but notice workers that died instead
+        summaries = []
+        while len(summaries) < num_shards:
+            try:
+                summaries.append(results.get(timeout=0.5))
+            except queue.Empty:
+                failed = [worker for worker in workers if worker.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Shard worker {failed[0].name} exited with code {failed[0].exitcode}")
+                if all(worker.exitcode is not None for worker in workers):
+                    raise RuntimeError("Shard workers exited without reporting results")
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    return merge_summaries(summary for _, summary in sorted(summaries, key=lambda item: item[0]))
+
+def print_gossip_summary(result, elapsed):
+    total = len(result['reached'])
+    print("\n--- Sharded Gossip Summary ---")
+    print(f"Transactions gossiped: {total}, blocked: {result['blocked']}")
+    print(f"Messages delivered: {result['messages']}")
+    if total:
+        print(f"Average nodes reached per transaction: {sum(result['reached'].values()) / total:.1f}")
+        print(f"Latest first delivery: {max(result['last_delivery'].values()):.3f}s (simulated)")
+    print(f"Wall-clock time: {elapsed:.2f}s")
@@ -2,6 +2,8 @@ import random
 import hashlib
 import time
 from collections import defaultdict
+from DifficultyRetarget import DifficultyRetarget
+from ShardedNetwork import GossipScenario, run_sharded, print_gossip_summary
 
 class Node:
     def __init__(self, node_id):
@@ -16,18 +18,23 @@ class Blockchain:
         self.chain = []
         self.pending_transactions = []
         self.nodes = {}  # Store node_id -> Node object
-        self.difficulty = 3  # Mining difficulty
+        self.consensus = DifficultyRetarget()  # Retargets the mining target from recent block times
 
     def create_genesis_block(self):
         genesis_block = self.create_block("Genesis Block")
         self.chain.append(genesis_block)
 
     def create_block(self, transactions):
+        previous_hash = self.hash(self.chain[-1]) if self.chain else '0'
+        target = self.consensus.target
+        nonce, stats = self.mine_block_nonce(previous_hash)
         block = {
             'index': len(self.chain) + 1,
             'transactions': transactions,
-            'previous_hash': self.hash(self.chain[-1]) if self.chain else '0',
-            'nonce': self.mine_block_nonce()
+            'previous_hash': previous_hash,
+            'target': f"{target:064x}",
+            'nonce': nonce,
+            'timestamp': stats['timestamp']
         }
         return block
 
@@ -48,14 +55,17 @@ class Blockchain:
     def hash(self, block):
         return hashlib.sha256(str(block).encode()).hexdigest()
 
-    def mine_block_nonce(self):
+    def mine_block_nonce(self, previous_hash):
         print("Mining block...")
+        start = time.perf_counter()  # Monotonic, so clock steps cannot skew retargeting
         nonce = 0
         while True:
-            guess = f"{nonce}".encode()
-            guess_hash = hashlib.sha256(guess).hexdigest()
-            if guess_hash[:self.difficulty] == "0" * self.difficulty:
-                return nonce  # Found a valid nonce
+            guess = f"{previous_hash}{nonce}".encode()
+            if self.consensus.meets_target(hashlib.sha256(guess).digest()):
+                solve_time = time.perf_counter() - start
+                stats = self.consensus.record_block(time.time(), solve_time, nonce + 1)
+                print(f"Nonce found in {stats['solve_time']:.3f}s at {stats['measured_hashrate']:.0f} H/s")
+                return nonce, stats  # Found a valid nonce
             nonce += 1
 
     def gossip_transaction(self, transaction):
@@ -112,7 +122,8 @@ def main():
         print("3. Trigger Sybil attack")
         print("4. Print blockchain")
         print("5. Print node balances")
-        print("6. Exit")
+        print("6. Run large-scale sharded Sybil gossip model")
+        print("7. Exit")
 
         choice = input("Enter your choice: ")
 
@@ -131,11 +142,15 @@ def main():
         elif choice == '4':
             print("\n--- Blockchain State ---")
             blockchain.print_chain()
+            blockchain.consensus.print_telemetry()
 
         elif choice == '5':
             blockchain.print_balances()
 
         elif choice == '6':
+            sharded_sybil_simulation()
+
+        elif choice == '7':
             print("Exiting the simulation. Goodbye!")
             break
 
@@ -161,6 +176,21 @@ def sybil_attack(blockchain):
     blockchain.add_block(blockchain.create_block(blockchain.pending_transactions))
     blockchain.pending_transactions.clear()
 
+# Large-scale Sybil gossip simulation split across worker processes. It models message
+# propagation over its own numbered nodes and does not touch the blockchain above.
+def sharded_sybil_simulation():
+    print("\n--- Sharded Sybil Simulation ---")
+    print("Simulates gossip on a separate generated network; balances and the chain are not used.")
+    num_honest = int(input("Enter the number of honest nodes: "))
+    num_sybil = int(input("Enter the number of fake (Sybil) nodes: "))
+    num_transactions = int(input("Enter the number of transactions to flood the network with: "))
+    num_shards = int(input("Enter the number of worker processes (0 = all cores): "))
+
+    scenario = GossipScenario(num_honest, num_sybil, num_transactions)
+    start = time.time()
+    result = run_sharded(scenario, num_shards or None)
+    print_gossip_summary(result, time.time() - start)
+
 # Run the simulation
 if __name__ == "__main__":
     main()
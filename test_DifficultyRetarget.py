@@ -0,0 +1,31 @@
+import pytest
+
+from DifficultyRetarget import DifficultyRetarget, INITIAL_TARGET, MAX_TARGET
+
+def test_slow_block_moves_target_at_most_max_adjustment():
+    consensus = DifficultyRetarget(max_adjustment=4)
+    consensus.record_block(0, 0.001, 1)
+    before = consensus.target
+    consensus.record_block(0, 100, 1)
+    assert consensus.target == before * 4
+
+def test_fast_block_moves_target_at_most_max_adjustment():
+    consensus = DifficultyRetarget(max_adjustment=4)
+    before = consensus.target
+    consensus.record_block(0, 0.000001, 1)
+    assert consensus.target == before // 4
+
+def test_target_follows_estimated_hashrate():
+    consensus = DifficultyRetarget(target_block_time=1.0)
+    # Exactly the expected work in exactly the target block time keeps the target steady
+    consensus.record_block(0, 1.0, int(consensus.difficulty))
+    assert consensus.target == pytest.approx(INITIAL_TARGET, rel=1e-9)
+
+def test_target_never_exceeds_max_target():
+    consensus = DifficultyRetarget(initial_target=MAX_TARGET)
+    consensus.record_block(0, 100, 1)
+    assert consensus.target == MAX_TARGET
+
+def test_invalid_parameters_rejected():
+    with pytest.raises(ValueError):
+        DifficultyRetarget(target_block_time=0)
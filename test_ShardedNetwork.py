@@ -0,0 +1,35 @@
+import pytest
+
+from ShardedNetwork import GossipScenario, run_sharded, run_single_process
+
+class FailingScenario(GossipScenario):
+    def node_rng(self, node, tx):
+        if node % 2 == 1:
+            raise MemoryError("simulated worker failure")
+        return super().node_rng(node, tx)
+
+@pytest.mark.parametrize("num_shards", [2, 3, 4])
+def test_sharded_run_matches_single_process_with_full_rings(num_shards):
+    scenario = GossipScenario(2000, 100, 8, seed=5)
+    expected = run_single_process(scenario)
+    assert expected['messages'] > 0
+    assert run_sharded(scenario, num_shards, ring_capacity=4) == expected
+
+def test_pos_scenario_blocks_low_stake_senders_but_still_gossips():
+    scenario = GossipScenario(500, 500, 40, minimum_stake=20, seed=2)
+    result = run_sharded(scenario, 2)
+    assert result['blocked'] > 0
+    assert result['messages'] > 0
+    assert result == run_single_process(scenario)
+
+def test_worker_failure_raises_instead_of_hanging():
+    with pytest.raises(RuntimeError):
+        run_sharded(FailingScenario(200, 20, 4), 2)
+
+def test_negative_shard_count_rejected():
+    with pytest.raises(ValueError):
+        run_sharded(GossipScenario(10, 2, 1), -1)
+
+def test_shared_memory_budget_too_small_for_shard_count():
+    with pytest.raises(ValueError):
+        run_sharded(GossipScenario(10, 2, 1), 4, shm_budget=1024)